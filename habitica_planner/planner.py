@@ -21,7 +21,7 @@ import tempfile
 from textwrap import dedent
 from typing import Union, List
 import pkg_resources
-import yaml
+import requests
 from habitipy.cli import ApplicationWithApi
 from habitipy.util import get_translation_for
 from plumbum.cli import Application, Predicate
@@ -32,9 +32,22 @@ from plumbum import local, FG
 _translation = get_translation_for('habitica_planner')
 _, ngettext = _translation.gettext, _translation.ngettext
 
+_TASK_HEADER = _("Task {self.name} with priority {self.priority}\n")  # noqa: Q000
+_TASK_ITEM = _("    - {}\n")  # noqa: Q000
+_PROGRESS_NOTE = dedent(_("""Please, do not edit this by hand!
+            Update the YAML file you got from first upload and fix everything there,
+            then run `habitica_planner update` to push new values to server.""")).replace(
+    '\n', ' ')
+_NO_ANSWERS = frozenset(('n', _("n")))  # noqa: Q000
+
+_VALID_PRIORITIES = frozenset((0.5, 1, 1.5, 2))
+_ID_KEYS = frozenset(('id', 'checklist_id'))
+
 
 class Task:
     'self-descriptive'
+    __slots__ = ('name', 'checklist', 'priority', 'id', 'checklist_id')
+
     def __init__(self, name: str = None, data: Union[List, int, float] = 1.0) -> None:
         self.name = name
         self.checklist = []  # type: List[Task]
@@ -45,96 +58,129 @@ class Task:
             self.priority = data
             data = []
         for e in data:
-            if isinstance(e, str):
-                self.checklist.append(Task(e))
+            parse = _ELEMENT_PARSERS.get(type(e))
+            if parse is None:
                 continue
-            if isinstance(e, dict):
-                if len(e) != 1:
-                    raise ValueError(
-                        'Strange dict from YAML parser: {}'.format(e))
-                k = tuple(e.keys())[0]
-                if k == 'priority':
-                    if e[k] in [0.5, 1, 1.5, 2]:
-                        self.priority = e[k]
-                    else:
-                        raise ValueError(
-                            'Invalid priority for task {}.\
-                            Expected one of 0.5, 1, 1.5, 2. Got: {}'.format(self.name, e[k]))
-                    continue
-                if k in ['id', 'checklist_id']:
-                    setattr(self, k, e[k])
-                if isinstance(e[k], (list, int, float)):
-                    self.checklist.append(Task(k, e[k]))
-                    continue
-                raise ValueError(
-                    'Unexpected element type {} of element {}'.format(type(e), e))
+            parse(self, e)
 
     def __repr__(self):
         message = '<Task {self.name} priority {self.priority} with subtasks {self.checklist}>'
         return message.format(self=self)
 
+    def _walk(self):
+        'iterate over this task and all its subtasks depth-first'
+        stack = [self]
+        while stack:
+            task = stack.pop()
+            yield task
+            stack.extend(reversed(task.checklist))
+
     def pretty_string(self, ind=0):
         'show markdown-like list of tasks'
-        res = '    ' * ind + '{}{}'
-        name = '' if self.name is None else '- ' + self.name
-        priority = '' if self.name is None else '({})'.format(self.priority)
-        ind += 0 if self.name is None else 1
-        res = res.format(name, priority)
-        cl = '\n'.join(map(lambda x: x.pretty_string(ind), self.checklist))
-        res += ('\n' if self.name else '') + cl if cl else ''
-        return res
+        out = []  # type: List[str]
+        self._pretty_string(out, '    ' * ind)
+        return '\n'.join(out)
+
+    def _pretty_string(self, out, indent):
+        'append lines of markdown-like list of tasks to out'
+        if self.name is not None:
+            out.append('{}- {}({})'.format(indent, self.name, self.priority))
+            indent += '    '
+        for task in self.checklist:
+            task._pretty_string(out, indent)  # pylint: disable=protected-access
 
     def will_be_pushed(self):
         'output individual tasks'
-        res = ''
+        out = []  # type: List[str]
+        self._will_be_pushed(out)
+        return ''.join(out)
+
+    def _will_be_pushed(self, out):
+        'append descriptions of individual tasks to out'
         if self.name:
-            res += _("Task {self.name} with priority {self.priority}\n").format(  # noqa: Q000
-                self=self)
+            out.append(_TASK_HEADER.format(self=self))
             for task in self.checklist:
-                res += _("    - {}\n").format(task.name)  # noqa: Q000
+                out.append(_TASK_ITEM.format(task.name))
         for task in self.checklist:
-            res += task.will_be_pushed()
-        return res
+            task._will_be_pushed(out)  # pylint: disable=protected-access
 
-    def push(self, api):
+    def push(self, api, session=requests):
         'send data to habitica server'
-        if self.name:
-            text = self.name + '  ![progress](http://progressed.io/bar/0 "progress")'
-            note = _("""Please, do not edit this by hand!
-            Update the YAML file you got from first upload and fix everything there,
-            then run `habitica_planner update` to push new values to server."""))
-            note = dedent(note).replace('\n',' ')
-            resp = api.tasks.user.post(
-                type='todo', text=text, notes=note, priority=str(self.priority))
-            self.id = resp['id']
-            task_number = 0
-            for task in self.checklist:
-                if task.name:
-                    task_number += 1
-                    resp = api.tasks[self.id].checklist.post(text=task.name)
-                    task.checklist_id = resp['checklist'][task_number]['id']
-        for task in Progress(self.checklist):
-            task.push(api)
+        order = [task for task in self._walk() if task.name]
+        for task in Progress(order):
+            task._push_self(api, session)  # pylint: disable=protected-access
+
+    def _push_self(self, api, session):
+        'send this task and its direct checklist to habitica server'
+        text = self.name + '  ![progress](http://progressed.io/bar/0 "progress")'
+        resp = api.tasks.user.post(
+            backend=session,
+            type='todo', text=text, notes=_PROGRESS_NOTE, priority=str(self.priority))
+        self.id = resp['id']
+        for task in self.checklist:
+            if task.name:
+                resp = api.tasks[self.id].checklist.post(backend=session, text=task.name)
+                task.checklist_id = resp['checklist'][-1]['id']
 
     def __iter__(self):
+        return iter(self._dump())
+
+    def _dump(self):
+        'list of properties and subtasks for YAML output'
+        res = []  # type: List[dict]
         if self.name:
             for prop in ['id', 'checklist_id', 'priority']:
                 val = getattr(self, prop)
                 if val:
-                    yield {prop: val}
+                    res.append({prop: val})
         for task in self.checklist:
             if task.name:
-                yield {task.name: list(task)}
+                res.append({task.name: task._dump()})  # pylint: disable=protected-access
+        return res
 
     def is_new(self):
         'checks if this is a previously unpushed Task'
-        if self.name:
-            n = self.name and self.id is None
+        if self.name and self.id is not None:
+            return False
+        for task in self.checklist:
+            if not task.is_new():
+                return False
+        return True
+
+
+def _parse_str_element(task: Task, e: str) -> None:
+    'plain subtask'
+    task.checklist.append(Task(e))
+
+
+def _parse_dict_element(task: Task, e: dict) -> None:
+    'task property or subtask with data'
+    if len(e) != 1:
+        raise ValueError(
+            'Strange dict from YAML parser: {}'.format(e))
+    (k, v), = e.items()
+    if k == 'priority':
+        if isinstance(v, (int, float)) and v in _VALID_PRIORITIES:
+            task.priority = v
         else:
-            n = True
-        for task in self.checklists:
-            n = n and task.is_new()
-        return n
+            raise ValueError(
+                'Invalid priority for task {}.\
+                Expected one of 0.5, 1, 1.5, 2. Got: {}'.format(task.name, v))
+        return
+    if k in _ID_KEYS:
+        setattr(task, k, v)
+        return
+    if isinstance(v, (list, int, float)):
+        task.checklist.append(Task(k, v))
+        return
+    raise ValueError(
+        'Unexpected element type {} of element {}'.format(type(e), e))
+
+
+_ELEMENT_PARSERS = {
+    str: _parse_str_element,
+    dict: _parse_dict_element,
+}
 
 
 def swap_out_err():
@@ -182,21 +228,30 @@ class PushData(ApplicationWithApi):
 
     def main(self, file: OptionalFile = None):
         'main algorithm'
+        # yaml is imported here to keep startup of other commands and --help fast
+        # pylint: disable=import-outside-toplevel
+        import yaml
+        try:
+            from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+        except ImportError:
+            from yaml import SafeLoader, SafeDumper  # type: ignore
         super().main()
         if file is None:
             editor = local[os.environ.get('EDITOR', 'nano')]
             with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
                 f.write(EXAMPLE_TASK_FILE)
                 f.file.close()
-                editor[f.name] & FG()  # pylint: disable=expression-not-assigned
-                with open(f.name) as newf:
-                    content = newf.read()
-                local['rm'](f.name)
+                try:
+                    editor[f.name] & FG()  # pylint: disable=expression-not-assigned
+                    with open(f.name) as newf:  # pylint: disable=unspecified-encoding
+                        content = newf.read()
+                finally:
+                    os.unlink(f.name)
+            d = yaml.load(content, Loader=SafeLoader)
         else:
-            with open(file) as f:
-                content = f.read()
+            with open(file) as f:  # pylint: disable=unspecified-encoding
+                d = yaml.load(f, Loader=SafeLoader)
         swap_out_err()
-        d = yaml.load(content)
         if not d:
             print(_("Tasks not found. Exiting."))  # noqa: Q000
             return 1
@@ -208,12 +263,14 @@ class PushData(ApplicationWithApi):
         print(_("Found this this tasks"))  # noqa: Q000
         print(t.will_be_pushed(), end='')
         r = input(_("Push to Habitica?[Y/n]"))  # noqa: Q000
-        if r in ['n', _("n")]:  # noqa: Q000
+        if r in _NO_ANSWERS:
             return 1
-        t.push(self.api)
+        with requests.Session() as session:
+            t.push(self.api, session)
         d = list(t)  # type: ignore # because python/mypy#2220
         swap_out_err()
-        print(yaml.dump(d, encoding='utf-8', allow_unicode=True).decode('utf-8'))
+        print(yaml.dump(
+            d, Dumper=SafeDumper, encoding='utf-8', allow_unicode=True).decode('utf-8'))
 
 
 def main():
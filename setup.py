@@ -21,6 +21,7 @@ import setuptools
 
 install_requires = [
     'PyYAML',
+    'requests',
     'plumbum',
     'habitipy'
 ]